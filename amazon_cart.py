@@ -17,56 +17,91 @@ from browser import (
 )
 
 
-def _add_one(page, asin, name):
-    """Add a single product to cart. Returns True on success."""
-    url = f"{AMAZON_CA}/dp/{asin}"
-    page.goto(url, wait_until="domcontentloaded", timeout=30000)
-    delay(3, 5)
+MAX_PARALLEL_PAGES = 4
+
+# Amazon uses different layouts for the add-to-cart button
+ADD_BUTTON_SELECTORS = [
+    "#add-to-cart-button",
+    "input[name='submit.add-to-cart']",
+    "#buy-now-button",
+    "#one-click-button",
+    "input#add-to-cart-button-ubb",
+    "span#submit\\.add-to-cart > input",
+    "input[value='Add to Cart']",
+    "input[value='Add to cart']",
+]
+
+# True once the cart badge rises above `before` or the page confirms the add
+_ADDED_CHECK_JS = """
+(before) => {
+    const n = parseInt(document.querySelector('#nav-cart-count')?.innerText || '0');
+    if (n > before) return true;
+    const t = (document.body?.innerText || '').toLowerCase();
+    return t.includes('added to cart') || t.includes('added to your');
+}
+"""
+
+
+def _find_add_button_in_page(page, selectors):
+    """Scroll to the first visible selector in one round-trip. Returns it or None."""
+    return page.evaluate("""
+    (sels) => {
+        for (const s of sels) {
+            const el = document.querySelector(s);
+            if (el && el.offsetParent !== null) {
+                el.scrollIntoView({block: 'center'});
+                return s;
+            }
+        }
+        return null;
+    }
+    """, selectors)
+
+
+def _start_loading(page, asin):
+    """Begin navigating to a product page; returns once the response starts."""
+    page.goto(f"{AMAZON_CA}/dp/{asin}", wait_until="commit", timeout=30000)
+
+
+def _add_one(page, asin, name, preloaded=False, pending=0):
+    """Add a single product to cart. Returns True on success.
+
+    With preloaded=True the page is already navigating (see _start_loading)
+    and we only wait for it to finish; this also follows Amazon's redirects
+    to a canonical or variation ASIN. pending is the number of adds made in
+    other tabs since this page loaded, which its cart badge doesn't show yet.
+    """
+    if preloaded:
+        page.wait_for_load_state("domcontentloaded", timeout=30000)
+    else:
+        page.goto(f"{AMAZON_CA}/dp/{asin}", wait_until="domcontentloaded", timeout=30000)
+    try:
+        page.wait_for_selector(", ".join(ADD_BUTTON_SELECTORS), timeout=10000)
+    except Exception:
+        pass
 
     remove_zoom_overlay(page)
 
-    # Try multiple button selectors — Amazon uses different layouts
-    button_selectors = [
-        "#add-to-cart-button",
-        "input[name='submit.add-to-cart']",
-        "#buy-now-button",
-        "#one-click-button",
-        "input#add-to-cart-button-ubb",
-        "span#submit\\.add-to-cart > input",
-        "input[value='Add to Cart']",
-        "input[value='Add to cart']",
-    ]
-
-    btn = None
-    for sel in button_selectors:
-        try:
-            # Scroll to it first
-            page.evaluate(f"document.querySelector('{sel}')?.scrollIntoView({{block: 'center'}})")
-            delay(0.5, 1.0)
-            candidate = page.locator(sel).first
-            if candidate.is_visible(timeout=2000):
-                btn = candidate
-                break
-        except Exception:
-            continue
+    sel = _find_add_button_in_page(page, ADD_BUTTON_SELECTORS)
+    btn = page.locator(sel).first if sel else None
 
     if not btn:
         page.screenshot(path=os.path.join(DEBUG_DIR, f"no_btn_{asin}.png"))
         return False
 
+    # Cart count before the click; the cart may already hold items
+    before = max(get_cart_count(page), 0) + pending
+    delay(0.2, 0.5)
     btn.click(force=True)
-    delay(4, 6)
+    try:
+        page.wait_for_function(_ADDED_CHECK_JS, arg=before, timeout=8000, polling=250)
+    except Exception:
+        pass
 
     dismiss_popups(page)
-    delay(1, 2)
 
-    # Verify
-    cart_count = get_cart_count(page)
-    if cart_count > 0:
-        return True
-
-    page_text = (page.text_content("body") or "").lower()
-    if "added to cart" in page_text or "added to your" in page_text:
+    # Verify — cart badge and confirmation text checked in one round-trip
+    if page.evaluate(_ADDED_CHECK_JS, before):
         return True
 
     page.screenshot(path=os.path.join(DEBUG_DIR, f"uncertain_{asin}.png"))
@@ -76,6 +111,9 @@ def _add_one(page, asin, name):
 def add_to_cart(context, products):
     """Add multiple products to cart.
 
+    Product pages are loaded side-by-side in up to MAX_PARALLEL_PAGES tabs;
+    the add-to-cart clicks themselves still happen one at a time.
+
     Args:
         context: Playwright browser context
         products: List of dicts with 'asin' and 'name' keys
@@ -83,29 +121,49 @@ def add_to_cart(context, products):
     Returns:
         List of dicts with 'asin', 'name', 'success' keys
     """
-    page = context.pages[0] if context.pages else context.new_page()
     results = []
 
-    for product in products:
-        asin = product["asin"]
-        name = product.get("name", asin)
+    for start in range(0, len(products), MAX_PARALLEL_PAGES):
+        batch = products[start:start + MAX_PARALLEL_PAGES]
+        pages = [context.new_page() for _ in batch]
         try:
-            success = _add_one(page, asin, name)
-        except Exception:
-            page.screenshot(path=os.path.join(DEBUG_DIR, f"error_{asin}.png"))
-            success = False
-        results.append({"asin": asin, "name": name, "success": success})
-        if len(results) < len(products):
-            delay(2, 4)
+            preloaded = []
+            for page, product in zip(pages, batch):
+                try:
+                    _start_loading(page, product["asin"])
+                    preloaded.append(True)
+                except Exception:
+                    # _add_one retries the navigation itself
+                    preloaded.append(False)
+
+            # Tabs in a batch loaded together, so later badges miss earlier adds
+            added = 0
+            for page, product, ready in zip(pages, batch, preloaded):
+                asin = product["asin"]
+                name = product.get("name", asin)
+                try:
+                    success = _add_one(page, asin, name, preloaded=ready, pending=added if ready else 0)
+                except Exception:
+                    page.screenshot(path=os.path.join(DEBUG_DIR, f"error_{asin}.png"))
+                    success = False
+                added += success
+                results.append({"asin": asin, "name": name, "success": success})
+        finally:
+            for page in pages:
+                try:
+                    page.close()
+                except Exception:
+                    pass
 
     return results
 
 
 def get_cart_screenshot(context):
-    """Navigate to cart and take a screenshot. Returns the file path."""
+    """Navigate to cart and take a screenshot. Returns the PNG bytes."""
     page = context.pages[0] if context.pages else context.new_page()
     page.goto(f"{AMAZON_CA}/gp/cart/view.html", wait_until="domcontentloaded", timeout=30000)
-    delay(3, 5)
-    path = os.path.join(DEBUG_DIR, "cart_screenshot.png")
-    page.screenshot(path=path)
-    return path
+    try:
+        page.wait_for_load_state("load", timeout=10000)
+    except Exception:
+        pass
+    return page.screenshot()
@@ -3,10 +3,15 @@
 Usage:
     from amazon_search import search_amazon
     results = search_amazon(pw, query="portable monitor", budget=300)
-    # results is a list of dicts: [{title, price, rating, reviews, screen_size, url, asin, score}, ...]
+    # results is a list of Product: title, price, rating, reviews, screen_size, url, asin, score
+
+    from amazon_search import search_amazon_many
+    batches = search_amazon_many(["portable monitor", "usb-c hub"], budget=300)
+    # batches[i] holds the results for the i-th query
 """
 
 import logging
+from collections import defaultdict
 import math
 import os
 import random
@@ -14,11 +19,42 @@ import re
 import time
 
 from browser import (
-    AMAZON_CA, DEBUG_DIR, delay, is_real_captcha,
+    AMAZON_CA, DEBUG_DIR, ContextPool, delay, is_real_captcha, pooled_context,
 )
+from models import Product
 
 logger = logging.getLogger("search")
 
+# Type queries key-by-key instead of filling the box in one call
+HUMAN_TYPING = os.environ.get("HUMAN_TYPING") == "1"
+
+# Precompiled patterns for the per-product parse helpers
+_RE_NOISE = re.compile(
+    r'\b(?:Unisex\s*-?\s*[Aa]dult|unisex-adult)\b\s*-?\s*'
+    r'|\b(?:mens|womens|unisex)\b\s*',
+    re.IGNORECASE,
+)
+_RE_DUP_WORD = re.compile(r'\b(\w+)\s+\1\b')
+_RE_DUP_CONCAT = re.compile(r'([A-Z][a-z]{2,})\1')
+_RE_DUP_PHRASE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\1s?')
+# Zero-width points where a space belongs. Each alternative's lookbehind also
+# accepts the spaces an earlier alternative inserts, so one pass does the work
+# of applying them in order.
+_RE_SPLIT_POINTS = re.compile(
+    # lowercase→uppercase: "MtbMTB" → "Mtb MTB"
+    r'(?<=[a-z])(?=[A-Z])'
+    # single uppercase letter jammed before a capitalized word: " XGoggle" → " X Goggle"
+    r'|(?<=[\sa-z][A-Z])(?=[A-Z][a-z]{2,})'
+    # single letter before a hyphenated word: " Mski-goggles" → " M ski-goggles"
+    r'|(?<=[\sa-z][SMLX])(?=[a-z]{1,3}-)'
+    r'|(?<=[\sa-z][A-Z][SMLX])(?=[a-z]{2,3}-)'
+)
+_RE_WS = re.compile(r'\s+')
+_RE_SCREEN_PATS = [
+    re.compile(p) for p in
+    [r'(\d+\.?\d*)\s*[-"]?\s*[Ii]nch', r'(\d+\.?\d*)\s*"', r'(\d+\.?\d*)["″]', r'(\d+\.?\d*)\s*[Ii]n\b']
+]
+
 
 # --- Brand detection ---
 
@@ -35,21 +71,17 @@ def _extract_brand(query):
     return query
 
 
-def _get_sidebar_brands(page):
-    """Extract available brand names from Amazon's left sidebar filters.
-
-    Returns list of {name, element_index} dicts.
-    """
-    return page.evaluate("""
-    () => {
+# Brand names in the sidebar of doc (the live page or a fetched one)
+_SIDEBAR_BRANDS_JS = """
+    (doc) => {
         const brands = [];
         // Amazon brand filter section — multiple possible containers
-        const sections = document.querySelectorAll(
+        const sections = doc.querySelectorAll(
             '#brandsRefinements, #p_89-title, [data-csa-c-slot-id="filter-p_89"]'
         );
 
         // Method 1: Brand refinement checkboxes
-        const checkboxes = document.querySelectorAll(
+        const checkboxes = doc.querySelectorAll(
             '#brandsRefinements li a, ' +
             '[id*="p_89"] li a, ' +
             'ul[aria-labelledby*="p_89"] li a'
@@ -61,9 +93,11 @@ def _get_sidebar_brands(page):
             }
         });
 
-        // Method 2: If no checkboxes found, look for brand links in left nav
+        // Method 2: If no checkboxes found, look for brand links in left nav —
+        // but only when the page has a brand section at all
         if (brands.length === 0) {
-            const links = document.querySelectorAll(
+            if (!doc.querySelector('#brandsRefinements, [id*="p_89"]')) return [];
+            const links = doc.querySelectorAll(
                 '#s-refinements .a-list-item a, ' +
                 '.s-navigation-indent .a-list-item a'
             );
@@ -78,15 +112,19 @@ def _get_sidebar_brands(page):
 
         return brands;
     }
-    """)
+"""
 
 
-def _apply_brand_filter(page, query):
-    """Match query words against Amazon sidebar brands and click the filter.
+def _get_sidebar_brands(page):
+    """Extract available brand names from Amazon's left sidebar filters.
 
-    Returns the brand name if a filter was applied, None otherwise.
+    Returns list of {name, element_index} dicts.
     """
-    sidebar_brands = _get_sidebar_brands(page)
+    return page.evaluate("() => (" + _SIDEBAR_BRANDS_JS + ")(document)")
+
+
+def _match_brand(sidebar_brands, query):
+    """Pick the sidebar brand that best matches a query word, or None."""
     if not sidebar_brands:
         return None
 
@@ -94,23 +132,43 @@ def _apply_brand_filter(page, query):
     # Strip trailing 's' for possessives/plurals (e.g., "Oakleys" → "oakley")
     query_words = [w.rstrip("s").rstrip("'") for w in query_lower.split()]
 
+    # Lowercased brand name -> brand info (first occurrence wins), plus the
+    # same brands bucketed by first letter for the prefix scan
+    brand_index = {}
+    by_letter = defaultdict(list)
+    for brand_info in sidebar_brands:
+        brand_lower = brand_info["name"].lower()
+        if brand_lower and brand_lower not in brand_index:
+            brand_index[brand_lower] = brand_info
+            by_letter[brand_lower[0]].append((brand_lower, brand_info))
+
     best_match = None
     best_score = 0
 
-    for brand_info in sidebar_brands:
-        brand_name = brand_info["name"]
-        brand_lower = brand_name.lower()
-
-        for word in query_words:
-            if len(word) < 2:
-                continue
-            # Exact match or starts-with match
-            if brand_lower == word or brand_lower.startswith(word) or word.startswith(brand_lower):
-                score = len(word)  # Longer match = better
-                if score > best_score:
-                    best_match = brand_info
-                    best_score = score
+    for word in query_words:
+        score = len(word)  # Longer match = better
+        if score < 2 or score <= best_score:
+            continue
+        # Exact match first, then starts-with match in either direction
+        match = brand_index.get(word)
+        if match is None:
+            for brand_lower, brand_info in by_letter.get(word[0], ()):
+                if brand_lower.startswith(word) or word.startswith(brand_lower):
+                    match = brand_info
+                    break
+        if match:
+            best_match = match
+            best_score = score
+
+    return best_match
 
+
+def _apply_brand_filter(page, query):
+    """Match query words against Amazon sidebar brands and click the filter.
+
+    Returns the brand name if a filter was applied, None otherwise.
+    """
+    best_match = _match_brand(_get_sidebar_brands(page), query)
     if not best_match:
         return None
 
@@ -124,15 +182,13 @@ def _apply_brand_filter(page, query):
         ).first
 
         if brand_link.is_visible(timeout=3000):
-            brand_link.click()
-            delay(3, 5)
+            _click_and_wait(page, brand_link)
             return brand_name
 
         # Fallback: try clicking by text content
         brand_link = page.locator(f'a:has(span:text-is("{brand_name}"))').first
         if brand_link.is_visible(timeout=2000):
-            brand_link.click()
-            delay(3, 5)
+            _click_and_wait(page, brand_link)
             return brand_name
     except Exception:
         pass
@@ -142,16 +198,66 @@ def _apply_brand_filter(page, query):
 
 # --- Search and extraction ---
 
+RESULT_SELECTOR = '[data-component-type="s-search-result"]'
+SEARCH_BOX_SELECTOR = "#twotabsearchtextbox, input[name='field-keywords']"
+CAPTCHA_FORM_SELECTOR = "form[action*='validateCaptcha']"
+
+
+def _click_and_wait(page, link):
+    """Click a link that reloads the results and wait for the new page."""
+    before = page.url
+    link.click()
+    try:
+        page.wait_for_url(lambda url: url != before, wait_until="domcontentloaded", timeout=10000)
+    except Exception:
+        pass
+    _wait_for_results(page)
+
+
+def _goto_home(page):
+    """Load the homepage and wait for the search box (or a CAPTCHA form)."""
+    page.goto(AMAZON_CA, wait_until="domcontentloaded", timeout=30000)
+    try:
+        page.wait_for_selector(f"{SEARCH_BOX_SELECTOR}, {CAPTCHA_FORM_SELECTOR}", timeout=10000)
+    except Exception:
+        pass
+
+
+def _wait_for_results(page, more_than=0, timeout=10000):
+    """Wait until the page shows more than `more_than` search results.
+
+    Also returns as soon as Amazon says there are no results or shows a
+    CAPTCHA, and gives up quietly on timeout.
+    """
+    try:
+        page.wait_for_function(
+            """([sel, n, stop]) => document.querySelectorAll(sel).length > n
+                || !!document.querySelector(stop)
+                || !!document.querySelector('.s-main-slot')?.textContent.includes('No results for')""",
+            arg=[RESULT_SELECTOR, more_than, CAPTCHA_FORM_SELECTOR],
+            timeout=timeout,
+            polling=250,
+        )
+    except Exception:
+        pass
+    delay(0.2, 0.5)
+
+
+def _wait_out_captcha(page, timeout_seconds=30):
+    """Poll until the CAPTCHA clears (e.g. solved by hand). Returns True if it did."""
+    for _ in range(timeout_seconds):
+        time.sleep(1)
+        if not is_real_captcha(page):
+            return True
+    return False
+
+
 def _navigate_and_search(page, query):
     """Go to Amazon.ca and perform a search."""
-    page.goto(AMAZON_CA, wait_until="domcontentloaded", timeout=30000)
-    delay(3, 5)
+    _goto_home(page)
 
-    if is_real_captcha(page):
-        time.sleep(30)
-        if is_real_captcha(page):
-            page.goto(AMAZON_CA, wait_until="domcontentloaded", timeout=30000)
-            delay(3, 5)
+    if is_real_captcha(page) and not _wait_out_captcha(page):
+        _goto_home(page)
 
     search_box = page.locator("#twotabsearchtextbox")
     if not search_box.is_visible(timeout=5000):
@@ -159,23 +265,29 @@ def _navigate_and_search(page, query):
 
     search_box.click()
     delay(0.3, 0.8)
-    search_box.fill("")
-    delay(0.2, 0.4)
-    search_box.press_sequentially(query, delay=random.uniform(0.04, 0.10) * 1000)
-    delay(1.0, 2.5)
+    if HUMAN_TYPING:
+        search_box.fill("")
+        delay(0.2, 0.4)
+        search_box.press_sequentially(query, delay=random.uniform(0.04, 0.10) * 1000)
+        delay(0.3, 0.8)
+    else:
+        search_box.fill(query)
+        delay(0.3, 0.7)
     page.keyboard.press("Enter")
-    delay(3, 5)
+    _wait_for_results(page)
 
     if is_real_captcha(page):
-        time.sleep(30)
+        _wait_out_captcha(page)
 
 
-def _extract_results(page):
-    """Extract product listings from search results via JS."""
-    return page.evaluate("""
-    () => {
+# Product listings in doc (the live page or a fetched one), skipping seenAsins
+_EXTRACT_RESULTS_JS = """
+    (doc, seenAsins) => {
         const products = [];
-        const items = document.querySelectorAll('[data-component-type="s-search-result"]');
+        const seen = new Set(seenAsins);
+        const REV_RE = /^\\(?([\\d,]+)\\)?$/;
+        const num = (x) => Number.isFinite(x) ? x : null;
+        const items = doc.querySelectorAll('[data-component-type="s-search-result"]');
         items.forEach(item => {
             try {
                 // Skip sponsored results — check multiple indicators
@@ -192,41 +304,52 @@ def _extract_results(page):
                 const imgCheck = item.querySelector('img.s-image');
                 if (imgCheck && /^Sponsored\\s+Ad/i.test(imgCheck.alt || '')) return;
 
+                // Skip ASINs already emitted (this page or a previous call)
+                const asinMatch = item.getAttribute('data-asin') || '';
+                if (asinMatch && seen.has(asinMatch)) return;
+
                 // Title: try multiple sources — Amazon uses different layouts
                 // 1. Product name in .a-size-medium (brand-filtered pages)
                 // 2. Full title from h2 > a (standard search pages)
                 // 3. Image alt text as fallback
+                // Each textContent read walks the subtree, so read each one once
                 const productName = item.querySelector('.a-size-medium.a-color-base, .a-size-medium');
                 const h2Link = item.querySelector('h2 a');
                 const h2El = item.querySelector('h2');
-                const imgEl = item.querySelector('img.s-image');
+                const imgEl = imgCheck;
                 const brand = h2El ? h2El.textContent.trim() : '';
+                const h2LinkText = h2Link ? h2Link.textContent.trim() : '';
                 let title = '';
+                let titleSource = 'h2';
                 if (productName) {
                     const pn = productName.textContent.trim();
-                    // Combine brand + product name if brand isn't already in the product name
-                    title = (brand && !pn.toLowerCase().startsWith(brand.toLowerCase()))
-                        ? brand + ' ' + pn : pn;
-                } else if (h2Link && h2Link.textContent.trim().length > brand.length) {
-                    title = h2Link.textContent.trim();
+                    // Combine brand + product name if brand isn't already in the product name.
+                    // h2 textContent joins child spans without spaces, so a prepended
+                    // brand counts as h2 text for cleanup
+                    if (brand && !pn.toLowerCase().startsWith(brand.toLowerCase())) {
+                        title = brand + ' ' + pn;
+                    } else {
+                        titleSource = 'pn';
+                        title = pn;
+                    }
+                } else if (h2LinkText.length > brand.length) {
+                    title = h2LinkText;
                 } else if (imgEl && imgEl.alt) {
+                    titleSource = 'alt';
                     // Strip "Sponsored Ad – " prefix from img alt
                     title = imgEl.alt.replace(/^Sponsored\s+Ad\s*[–—-]\s*/i, '').trim();
                 } else {
                     title = brand;
                 }
-                const linkEl = item.querySelector('h2 a');
-                const href = linkEl ? linkEl.getAttribute('href') : '';
-                const asinMatch = item.getAttribute('data-asin') || '';
+                const href = h2Link ? h2Link.getAttribute('href') : '';
 
-                let price = '';
+                let price = null;
                 const priceWhole = item.querySelector('.a-price .a-price-whole');
                 const priceFraction = item.querySelector('.a-price .a-price-fraction');
                 if (priceWhole) {
-                    price = priceWhole.textContent.replace(',', '').trim();
-                    if (priceFraction) {
-                        price = price.replace('.', '') + '.' + priceFraction.textContent.trim();
-                    }
+                    const whole = priceWhole.textContent.replace(/[^\\d]/g, '');
+                    const frac = priceFraction ? priceFraction.textContent.replace(/[^\\d]/g, '') : '';
+                    if (whole) price = num(parseFloat(whole + '.' + (frac || '0')));
                 }
 
                 let ratingText = '';
@@ -251,20 +374,18 @@ def _extract_results(page):
                 }
 
                 let reviewText = '';
-                // Review count: look for links to reviews containing a number in parens like "(121)"
-                const reviewLink = item.querySelector('a[href*="/dp/"] + a, a[href*="customerReviews"], a[href*="#customerReviews"]');
-                // Broader: find any link whose text is a number in parens
-                const allLinks = item.querySelectorAll('a');
-                for (const a of allLinks) {
+                // Review count: look for links to reviews containing a number in parens like "(121)".
+                // Only review-ish hrefs qualify (not price or offer links), so filter in the selector.
+                const reviewLinks = item.querySelectorAll(
+                    'a[href*="/dp/"], a[href*="customerReview"], a[href*="ref=sr_"]'
+                );
+                for (const a of reviewLinks) {
                     const txt = a.textContent.trim();
-                    const m = txt.match(/^\(?([\d,]+)\)?$/);
+                    if (txt.length === 0 || txt.length > 12) continue;
+                    const m = txt.match(REV_RE);
                     if (m && parseInt(m[1].replace(',','')) > 0) {
-                        const href = a.getAttribute('href') || '';
-                        // Make sure it's a review link, not a price or offer link
-                        if (href.includes('/dp/') || href.includes('customerReview') || href.includes('ref=sr_')) {
-                            reviewText = m[1];
-                            break;
-                        }
+                        reviewText = m[1];
+                        break;
                     }
                 }
                 // Fallback: original selectors
@@ -284,75 +405,78 @@ def _extract_results(page):
                 }
                 }
 
-                if (title) products.push({ title, price, rating: ratingText, reviews: reviewText, asin: asinMatch, href });
+                // Parse rating and review count here so only numbers cross back to Python
+                let rating = null;
+                if (ratingText) {
+                    const outOf = ratingText.match(/([\\d.]+)\\s*(?:out of|\\/)\\s*5/);
+                    if (outOf) {
+                        rating = num(parseFloat(outOf[1]));
+                    } else {
+                        const n = ratingText.match(/[\\d.]+/);
+                        const val = n ? parseFloat(n[0]) : NaN;
+                        rating = val <= 5.0 ? num(val) : null;
+                    }
+                }
+
+                let reviews = 0;
+                if (reviewText) {
+                    const t = reviewText.replace(/,/g, '');
+                    const k = t.match(/([\\d.]+)\\s*[Kk]/);
+                    const n = t.match(/\\d+/);
+                    reviews = (k ? num(Math.trunc(parseFloat(k[1]) * 1000)) : (n ? parseInt(n[0], 10) : 0)) || 0;
+                }
+
+                if (title) {
+                    if (asinMatch) seen.add(asinMatch);
+                    products.push({ title, title_source: titleSource, price, rating, reviews, asin: asinMatch, href });
+                }
             } catch (e) {}
         });
         return products;
     }
-    """)
+"""
+
+
+def _extract_results(page, seen_asins=()):
+    """Extract product listings from search results via JS.
+
+    ASINs in seen_asins, and repeats within the page, are skipped in-page.
+    price and rating come back as numbers or None, reviews as an int.
+    """
+    return page.evaluate(
+        "(seen) => (" + _EXTRACT_RESULTS_JS + ")(document, seen)", list(seen_asins)
+    )
 
 
 # --- Parsing helpers ---
 
-def _clean_title(title):
-    """Clean up Amazon title quirks."""
+def _clean_title(title, full=True):
+    """Clean up Amazon title quirks.
+
+    The concatenation fixes only matter for text that can come back jammed
+    together (img alt, h2 textContent); pass full=False for titles read
+    from the product name alone.
+    """
     # Remove noise words first
-    title = re.sub(r'\b(?:Unisex\s*-?\s*[Aa]dult|unisex-adult)\b\s*-?\s*', '', title, flags=re.IGNORECASE)
-    title = re.sub(r'\b(?:mens|womens|unisex)\b\s*', '', title, flags=re.IGNORECASE)
+    title = _RE_NOISE.sub('', title)
     # Remove duplicate consecutive words: "Oakley Oakley" → "Oakley"
-    title = re.sub(r'\b(\w+)\s+\1\b', r'\1', title)
+    title = _RE_DUP_WORD.sub(r'\1', title)
+    if not full:
+        return _RE_WS.sub(' ', title).strip()
     # Fix repeated word within concatenation: "GoggleGoggle" → "Goggle"
-    title = re.sub(r'([A-Z][a-z]{2,})\1', r'\1', title)
+    title = _RE_DUP_CONCAT.sub(r'\1', title)
     # Fix repeated phrase: "Snow GoggleSnow Goggles" → "Snow Goggles"
-    title = re.sub(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\1s?', r'\1', title)
-    # Fix lowercase→uppercase: "MtbMTB" → "Mtb MTB"
-    title = re.sub(r'([a-z])([A-Z])', r'\1 \2', title)
-    # Fix single uppercase letter jammed before capitalized word (only after space/start)
-    title = re.sub(r'(?<=\s)([A-Z])([A-Z][a-z]{2,})', r'\1 \2', title)
-    # Fix single letter before hyphenated word: "Mski-goggles" → "M ski-goggles"
-    # Only match when preceded by space (avoid breaking "Large-Sized")
-    title = re.sub(r'(?<=\s)([SMLX])([a-z]{1,3}-)', r'\1 \2', title)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _RE_DUP_PHRASE.sub(r'\1', title)
+    # Split jammed words: "MtbMTB" → "Mtb MTB", "Mski-goggles" → "M ski-goggles"
+    # Letter fixes only apply after a space (avoid breaking "Large-Sized")
+    title = _RE_SPLIT_POINTS.sub(' ', title)
+    title = _RE_WS.sub(' ', title).strip()
     return title
 
 
-def _parse_price(s):
-    if not s:
-        return None
-    cleaned = re.sub(r'[^\d.]', '', s)
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
-
-
-def _parse_rating(s):
-    if not s:
-        return None
-    m = re.search(r'([\d.]+)\s*(?:out of|/)\s*5', s)
-    if m:
-        return float(m.group(1))
-    m = re.search(r'([\d.]+)', s)
-    if m:
-        val = float(m.group(1))
-        return val if val <= 5.0 else None
-    return None
-
-
-def _parse_reviews(s):
-    if not s:
-        return 0
-    cleaned = s.replace(',', '').strip()
-    m = re.search(r'([\d.]+)\s*[Kk]', cleaned)
-    if m:
-        return int(float(m.group(1)) * 1000)
-    m = re.search(r'(\d+)', cleaned)
-    return int(m.group(1)) if m else 0
-
-
 def _parse_screen_size(title):
-    for pat in [r'(\d+\.?\d*)\s*[-"]?\s*[Ii]nch', r'(\d+\.?\d*)\s*"', r'(\d+\.?\d*)["″]', r'(\d+\.?\d*)\s*[Ii]n\b']:
-        m = re.search(pat, title)
+    for pat in _RE_SCREEN_PATS:
+        m = pat.search(title)
         if m:
             size = float(m.group(1))
             if 10 <= size <= 30:
@@ -367,46 +491,68 @@ EXCLUDE_KEYWORDS = [
 ]
 
 
+_KW_ALT = "|".join(map(re.escape, EXCLUDE_KEYWORDS))
+# An accessory keyword leading the title, or used as "<kw> for ..." / "<kw>, ..."
+_EXCLUDE_RE = re.compile(rf'^(?:{_KW_ALT})| (?:{_KW_ALT})(?: for |,)')
+_MONITOR_RE = re.compile(r'monitor|display|screen')
+
+
 def _is_actual_monitor(title):
     lower = title.lower()
-    monitor_terms = ["monitor", "display", "screen"]
-    has_monitor = any(t in lower for t in monitor_terms)
-    for kw in EXCLUDE_KEYWORDS:
-        if lower.startswith(kw) or f" {kw} for " in lower or f" {kw}," in lower:
-            return False
-        if kw in lower and not has_monitor:
-            return False
-    return has_monitor
+    # Without a monitor term any title fails; with one only the accessory patterns exclude
+    return bool(_MONITOR_RE.search(lower)) and not _EXCLUDE_RE.search(lower)
+
 
+# --- Filter, deduplicate, rank ---
 
-# --- Filter, rank, deduplicate ---
+def _process(raw, budget, monitor_only=False):
+    """Filter, parse and deduplicate raw results in a single pass.
 
-def _filter_and_parse(raw, budget, monitor_only=False):
-    parsed = []
+    Returns (products, max_reviews) — max_reviews is the largest review
+    count kept, used by _rank for relative scaling.
+    """
+    seen_asins, seen_titles, out = set(), set(), []
+    max_reviews = 0
     for r in raw:
-        if monitor_only and not _is_actual_monitor(r.get("title", "")):
+        raw_title = r.get("title", "")
+        if monitor_only and not _is_actual_monitor(raw_title):
             continue
-        price = _parse_price(r.get("price", ""))
+        price = r.get("price")
         if price is not None and price > budget:
             continue
+        # Skip duplicate ASINs before doing any title work
         asin = r.get("asin", "")
+        if asin and asin in seen_asins:
+            continue
+        # Skip duplicate titles — _clean_title already collapses whitespace
+        title = _clean_title(raw_title, full=r.get("title_source") != "pn")
+        tk = title.lower()
+        if tk in seen_titles:
+            continue
+        if asin:
+            seen_asins.add(asin)
+        seen_titles.add(tk)
+
         href = r.get("href", "")
         url = f"https://www.amazon.ca/dp/{asin}" if asin else (f"https://www.amazon.ca{href}" if href.startswith("/") else href)
-        parsed.append({
-            "title": _clean_title(r.get("title", "")),
+        reviews = r.get("reviews") or 0
+        if reviews > max_reviews:
+            max_reviews = reviews
+        out.append({
+            "title": title,
             "price": price,
-            "rating": _parse_rating(r.get("rating", "")),
-            "reviews": _parse_reviews(r.get("reviews", "")),
-            "screen_size": _parse_screen_size(r.get("title", "")),
+            "rating": r.get("rating"),
+            "reviews": reviews,
+            "screen_size": _parse_screen_size(raw_title),
             "url": url,
             "asin": asin,
         })
-    return parsed
+    return out, max_reviews
 
 
-def _rank(products):
-    # Find max reviews in this result set for relative scaling
-    max_reviews = max((p["reviews"] for p in products if p["reviews"]), default=1)
+def _rank(products, max_reviews):
+    # max_reviews is tracked by _process; used for relative scaling
+    max_reviews = max_reviews or 1
 
     for p in products:
         score = 0.0
@@ -435,39 +581,40 @@ def _rank(products):
     return products
 
 
-def _deduplicate(products):
-    seen_asins, seen_titles, unique = set(), set(), []
-    for p in products:
-        # Skip duplicate ASINs
-        if p["asin"] and p["asin"] in seen_asins:
-            continue
-        # Skip duplicate titles — use full title for comparison, not truncated
-        tk = re.sub(r'\s+', ' ', p["title"].lower().strip())
-        if tk in seen_titles:
-            continue
-        if p["asin"]:
-            seen_asins.add(p["asin"])
-        seen_titles.add(tk)
-        unique.append(p)
-    return unique
-
-
-# --- Public API ---
+# Parse fetched results HTML once, reading both the sidebar and the listings
+_PARSE_FETCHED_JS = (
+    "(html) => { const doc = new DOMParser().parseFromString(html, 'text/html');"
+    " return {brands: (" + _SIDEBAR_BRANDS_JS + ")(doc),"
+    " products: (" + _EXTRACT_RESULTS_JS + ")(doc, [])}; }"
+)
 
-def search_amazon(context, query, budget=300.0):
-    """Search Amazon.ca and return ranked results.
 
-    Args:
-        context: Playwright browser context (from browser.setup_browser)
-        query: Search terms (e.g. "portable monitor")
-        budget: Max price in CAD
+def _fetch_raw(context, page, query):
+    """Fetch the results page over HTTP and parse it without rendering.
 
-    Returns:
-        List of product dicts, ranked by score. Each has:
-        title, price, rating, reviews, screen_size, url, asin, score
+    The request goes through the context, so it carries its cookies. Returns
+    None when the browser path is needed instead: CAPTCHA, an error status,
+    a brand filter to click, or too few results (which would mean scrolling).
     """
-    page = context.pages[0] if context.pages else context.new_page()
+    try:
+        # Best effort: a slow answer just means taking the browser path
+        resp = context.request.get(f"{AMAZON_CA}/s", params={"k": query}, timeout=4000)
+        if not resp.ok:
+            return None
+        html = resp.text()
+        if "validateCaptcha" in html:
+            return None
+        parsed = page.evaluate(_PARSE_FETCHED_JS, html)
+    except Exception:
+        return None
+    if _match_brand(parsed["brands"], query):
+        return None
+    raw = parsed["products"]
+    return raw if len(raw) >= 15 else None
+
 
+def _collect_raw(page, query):
+    """Run the search and gather raw listings, scrolling/paginating if sparse."""
     _navigate_and_search(page, query)
 
     # Try to apply brand filter from sidebar if query contains a brand name
@@ -478,11 +625,13 @@ def search_amazon(context, query, budget=300.0):
     raw = _extract_results(page)
     logger.info(f"Initial extraction: {len(raw)} results")
 
-    # Scroll for more
+    # Scroll for more — results pages rarely lazy-load rows, so only a short wait
     if len(raw) < 15:
+        shown = page.locator(RESULT_SELECTOR).count()
         page.mouse.wheel(0, 2000)
-        delay(3, 5)
-        raw = _extract_results(page)
+        _wait_for_results(page, more_than=shown, timeout=1500)
+        # Only rows not already extracted come back
+        raw.extend(_extract_results(page, {r["asin"] for r in raw if r.get("asin")}))
         logger.info(f"After scroll: {len(raw)} results")
 
     # Page 2 if needed
@@ -490,13 +639,37 @@ def search_amazon(context, query, budget=300.0):
         try:
             next_btn = page.locator("a.s-pagination-next, a:has-text('Next')")
             if next_btn.is_visible(timeout=3000):
-                next_btn.click()
-                delay(3, 5)
-                page2 = _extract_results(page)
+                _click_and_wait(page, next_btn)
+                page2 = _extract_results(page, {r["asin"] for r in raw if r.get("asin")})
                 logger.info(f"Page 2: {len(page2)} results")
                 raw.extend(page2)
         except Exception:
             pass
+    return raw
+
+
+# --- Public API ---
+
+def search_amazon(context, query, budget=300.0):
+    """Search Amazon.ca and return ranked results.
+
+    Args:
+        context: Playwright browser context, ideally a ContextPool one
+            (pooled_context()), which already blocks images, fonts and CSS
+        query: Search terms (e.g. "portable monitor")
+        budget: Max price in CAD
+
+    Returns:
+        List of Product, ranked by score. Each has:
+        title, price, rating, reviews, screen_size, url, asin, score
+    """
+    page = context.pages[0] if context.pages else context.new_page()
+
+    raw = _fetch_raw(context, page, query)
+    if raw is None:
+        raw = _collect_raw(page, query)
+    else:
+        logger.info("Served from the static results page")
 
     logger.info(f"Total raw results: {len(raw)}")
 
@@ -507,9 +680,38 @@ def search_amazon(context, query, budget=300.0):
     # Only apply monitor-specific filtering if searching for monitors
     monitor_terms = ["monitor", "display", "screen"]
     is_monitor_search = any(t in query.lower() for t in monitor_terms)
-    filtered = _filter_and_parse(raw, budget, monitor_only=is_monitor_search)
-    logger.info(f"After filter/parse: {len(filtered)} results")
-    deduped = _deduplicate(filtered)
-    logger.info(f"After dedup: {len(deduped)} results")
-    ranked = _rank(deduped)
-    return ranked[:10]
+    products, max_reviews = _process(raw, budget, monitor_only=is_monitor_search)
+    logger.info(f"After filter/parse/dedup: {len(products)} results")
+    ranked = _rank(products, max_reviews)
+    return [Product(**p) for p in ranked[:10]]
+
+
+def search_amazon_many(queries, budget=300.0, workers=4, storage_state=None):
+    """Search several queries concurrently.
+
+    Runs on a temporary ContextPool of headless browsers; pass storage_state
+    (e.g. the signed-in context's cookies) to search signed in.
+
+    Returns:
+        List of result lists, in the same order as queries. A query that
+        fails yields an empty list.
+    """
+    if not queries:
+        return []
+
+    pool = ContextPool(size=max(1, min(workers, len(queries))), storage_state=storage_state)
+    try:
+        futures = [
+            pool.submit(lambda q: search_amazon(pooled_context(), q, budget), q)
+            for q in queries
+        ]
+        results = []
+        for query, future in zip(queries, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Search failed for {query!r}: {e}")
+                results.append([])
+    finally:
+        pool.shutdown()
+    return results
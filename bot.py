@@ -21,13 +21,19 @@ import logging
 import os
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import Application, MessageHandler, filters, ContextTypes
 
+from playwright.sync_api import sync_playwright
+
+from amazon_cart import add_to_cart, get_cart_screenshot
+from amazon_search import search_amazon
+from browser import ContextPool, ensure_signed_in, pooled_context, setup_browser
 from parser import parse_message
 
 logging.basicConfig(format="%(asctime)s [%(name)s] %(message)s", level=logging.INFO)
@@ -40,9 +46,17 @@ if not TOKEN:
 
 # --- State ---
 last_results = []       # Last search results
+last_results_text = None  # format_results(last_results), set with it
 browser_context = None  # Playwright browser context
 pw_instance = None      # Playwright instance
-browser_lock = threading.Lock()
+browser_lock = threading.Lock()  # Guards the signed-in context (cart operations)
+
+# Playwright sync objects are bound to the thread that created them, so every
+# browser call goes through an executor created in main() and kept in
+# bot_data: "browser_executor" (one thread) owns the signed-in context, and
+# "search_pool" runs read-only searches concurrently on pooled contexts
+# seeded with its cookies, which never wait on browser_lock.
+SEARCH_POOL_SIZE = 4
 
 
 # --- Browser management (runs in thread since Playwright is sync) ---
@@ -53,9 +67,6 @@ def _get_browser():
     if browser_context:
         return browser_context
 
-    from playwright.sync_api import sync_playwright
-    from browser import setup_browser
-
     pw_instance = sync_playwright().start()
     browser_context = setup_browser(pw_instance)
     return browser_context
@@ -77,37 +88,57 @@ def _close_browser():
         pw_instance = None
 
 
+def _signed_in_browser(timeout_seconds=30):
+    """Get the browser context, re-checking Amazon sign-in if the last check is stale."""
+    ctx = _get_browser()
+    page = ctx.pages[0] if ctx.pages else ctx.new_page()
+    if not ensure_signed_in(page, timeout_seconds=timeout_seconds):
+        logger.warning("Not signed into Amazon.ca — sign in from the browser window")
+    return ctx
+
+
+def _prewarm():
+    """Launch the signed-in browser and wait for Amazon sign-in."""
+    _signed_in_browser(timeout_seconds=90)
+
+
+def _signed_in_state():
+    """Snapshot the signed-in context's cookies for the search pool."""
+    return _get_browser().storage_state()
+
+
 def _run_search(query, budget):
-    """Run Amazon search in thread. Returns list of products."""
-    from amazon_search import search_amazon
-    with browser_lock:
-        ctx = _get_browser()
-        return search_amazon(ctx, query, budget)
+    """Run Amazon search on a search pool thread.
+
+    Returns (products, formatted reply) so the formatting also happens off
+    the event loop.
+    """
+    results = search_amazon(pooled_context(), query, budget)
+    return results, format_results(results)
 
 
 def _run_add_to_cart(products):
     """Add products to cart in thread. Returns list of results."""
-    from amazon_cart import add_to_cart
     with browser_lock:
-        ctx = _get_browser()
+        ctx = _signed_in_browser()
         return add_to_cart(ctx, products)
 
 
 def _run_cart_screenshot():
-    """Take cart screenshot in thread. Returns file path."""
-    from amazon_cart import get_cart_screenshot
+    """Take cart screenshot in thread. Returns PNG bytes."""
     with browser_lock:
-        ctx = _get_browser()
+        ctx = _signed_in_browser()
         return get_cart_screenshot(ctx)
 
 
 # --- Telegram message formatting ---
 
+_ESC_TABLE = str.maketrans({ch: None for ch in '*_`['})
+
+
 def _esc(text):
     """Escape Telegram MarkdownV1 special characters in text."""
-    for ch in ['*', '_', '`', '[']:
-        text = text.replace(ch, '')
-    return text
+    return text.translate(_ESC_TABLE)
 
 
 def format_results(products):
@@ -117,15 +148,15 @@ def format_results(products):
 
     lines = ["*Amazon.ca Search Results*\n"]
     for i, p in enumerate(products[:10], 1):
-        price = f"${p['price']:.2f}" if p['price'] else "N/A"
-        rating = f"{p['rating']:.1f}/5" if p['rating'] else "N/A"
-        reviews = f"{p['reviews']:,}" if p['reviews'] else "0"
-        title = _esc(p['title'][:60])
+        price = f"${p.price:.2f}" if p.price else "N/A"
+        rating = f"{p.rating:.1f}/5" if p.rating else "N/A"
+        reviews = f"{p.reviews:,}" if p.reviews else "0"
+        title = _esc(p.title[:60])
 
         lines.append(f"*#{i}* {title}")
         lines.append(f"  {price} CAD | {rating} ({reviews} reviews)")
-        if p.get('url'):
-            lines.append(f"  {p['url']}")
+        if p.url:
+            lines.append(f"  {p.url}")
         lines.append("")
 
     lines.append("Reply `add all` or `add 1 3` to add to cart")
@@ -167,12 +198,13 @@ HELP_TEXT = """*Amazon Shopping Bot* 🛒
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle all text messages."""
-    global last_results
+    global last_results, last_results_text
 
     text = update.message.text
     if not text:
         return
 
+    loop = asyncio.get_running_loop()
     parsed = parse_message(text)
     intent = parsed["intent"]
     logger.info(f"Message: '{text}' → intent={intent}, query='{parsed['query']}', budget={parsed['budget']}")
@@ -182,7 +214,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if intent == "status":
-        browser_status = "🟢 Running" if browser_context else "⚪ Not started (will launch on first search)"
+        browser_status = "🟢 Running" if browser_context else "🔴 Not running (restart the bot)"
         await update.message.reply_text(
             f"*Bot Status*\n\nBrowser: {browser_status}\nLast results: {len(last_results)} items",
             parse_mode="Markdown",
@@ -191,7 +223,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if intent == "results":
         if last_results:
-            await update.message.reply_text(format_results(last_results), parse_mode="Markdown")
+            await update.message.reply_text(last_results_text, parse_mode="Markdown")
         else:
             await update.message.reply_text("No recent results. Run a search first.")
         return
@@ -200,16 +232,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = parsed["query"]
         budget = parsed["budget"]
         budget_msg = f" (budget: ${budget:.0f} CAD)" if parsed.get("budget_specified") else ""
-        await update.message.reply_text(f"🔍 Searching Amazon.ca for *{query}*{budget_msg}...", parse_mode="Markdown")
+        status = await update.message.reply_text(f"🔍 Searching Amazon.ca for *{query}*{budget_msg}...", parse_mode="Markdown")
 
-        loop = asyncio.get_event_loop()
         try:
-            results = await loop.run_in_executor(None, _run_search, query, budget)
-            last_results = results
-            await update.message.reply_text(format_results(results), parse_mode="Markdown")
+            results, reply = await loop.run_in_executor(context.bot_data["search_pool"], _run_search, query, budget)
+            last_results, last_results_text = results, reply
+            await status.edit_text(reply, parse_mode="Markdown")
         except Exception as e:
             logger.error(f"Search failed: {e}")
-            await update.message.reply_text(f"❌ Search failed: {e}")
+            await status.edit_text(f"❌ Search failed: {e}")
         return
 
     if intent == "add":
@@ -231,28 +262,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         names = ", ".join(f"#{i}" for i in (items if items != "all" else range(1, len(to_add) + 1)))
-        await update.message.reply_text(f"🛒 Adding {len(to_add)} item(s) to cart...")
+        status = await update.message.reply_text(f"🛒 Adding {len(to_add)} item(s) to cart...")
 
-        products_to_add = [{"asin": p["asin"], "name": p["title"][:50]} for p in to_add]
+        products_to_add = [{"asin": p.asin, "name": p.title[:50]} for p in to_add]
 
-        loop = asyncio.get_event_loop()
         try:
-            results = await loop.run_in_executor(None, _run_add_to_cart, products_to_add)
-            await update.message.reply_text(format_cart_results(results), parse_mode="Markdown")
+            results = await loop.run_in_executor(context.bot_data["browser_executor"], _run_add_to_cart, products_to_add)
+            await status.edit_text(format_cart_results(results), parse_mode="Markdown")
         except Exception as e:
             logger.error(f"Add to cart failed: {e}")
-            await update.message.reply_text(f"❌ Add to cart failed: {e}")
+            await status.edit_text(f"❌ Add to cart failed: {e}")
         return
 
     if intent == "cart":
-        await update.message.reply_text("📸 Taking cart screenshot...")
-        loop = asyncio.get_event_loop()
+        status = await update.message.reply_text("📸 Taking cart screenshot...")
         try:
-            path = await loop.run_in_executor(None, _run_cart_screenshot)
-            await update.message.reply_photo(photo=open(path, "rb"), caption="Your Amazon.ca cart")
+            png = await loop.run_in_executor(context.bot_data["browser_executor"], _run_cart_screenshot)
+            await update.message.reply_photo(photo=png, caption="Your Amazon.ca cart")
+            await status.delete()
         except Exception as e:
             logger.error(f"Cart screenshot failed: {e}")
-            await update.message.reply_text(f"❌ Failed: {e}")
+            await status.edit_text(f"❌ Failed: {e}")
         return
 
     # Unknown
@@ -262,14 +292,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(HELP_TEXT, parse_mode="Markdown")
-
-
-async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(HELP_TEXT, parse_mode="Markdown")
-
-
 # --- Main ---
 
 def main():
@@ -283,18 +305,30 @@ def main():
 
     app = Application.builder().token(TOKEN).build()
 
-    app.add_handler(CommandHandler("start", cmd_start))
-    app.add_handler(CommandHandler("help", cmd_help))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    # Also handle slash commands as text (e.g., /search ...)
-    app.add_handler(MessageHandler(filters.COMMAND, handle_message))
+    browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+    app.bot_data["browser_executor"] = browser_executor
+    search_pool = None
+
+    # One handler for plain text and slash commands; the parser strips the
+    # leading / and maps start/help to the help intent
+    app.add_handler(MessageHandler(filters.TEXT | filters.COMMAND, handle_message))
 
     try:
+        # Warm the browsers up front so the first command skips the cold start
+        print("  Launching browser (sign into Amazon.ca if prompted)...")
+        browser_executor.submit(_prewarm).result()
+        storage_state = browser_executor.submit(_signed_in_state).result()
+        search_pool = ContextPool(size=SEARCH_POOL_SIZE, storage_state=storage_state)
+        app.bot_data["search_pool"] = search_pool
+
         app.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         pass
     finally:
-        _close_browser()
+        if search_pool is not None:
+            search_pool.shutdown()
+        browser_executor.submit(_close_browser).result()
+        browser_executor.shutdown()
         print("\n  Bot stopped. Browser closed.")
 
 
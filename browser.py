@@ -1,54 +1,242 @@
 """Shared Playwright browser setup and utilities for Amazon.ca."""
 
+import logging
 import os
+import queue
 import random
+import threading
 import time
+from concurrent.futures import Executor, Future
+from urllib.parse import urlparse
 
 AMAZON_CA = "https://www.amazon.ca"
 BROWSER_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".browser-profile")
 DEBUG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "debug")
 os.makedirs(DEBUG_DIR, exist_ok=True)
 
+logger = logging.getLogger("browser")
+
 
 def delay(lo=1.5, hi=3.0):
     time.sleep(random.uniform(lo, hi))
 
 
-def setup_browser(playwright):
-    return playwright.chromium.launch_persistent_context(
-        BROWSER_PROFILE_DIR,
-        headless=False,
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/122.0.0.0 Safari/537.36"
+)
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled"]
+
+# Requests the scrapers never need: we read DOM text and img alt, not pixels
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "other"}
+BLOCKED_HOSTS = ("fls-na.amazon.ca", "amazon-adsystem.com")
+
+
+def _context_options():
+    return dict(
         viewport={"width": random.randint(1280, 1440), "height": random.randint(800, 900)},
-        user_agent=(
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0.0.0 Safari/537.36"
-        ),
+        user_agent=USER_AGENT,
         locale="en-CA",
         timezone_id="America/Toronto",
-        args=["--disable-blink-features=AutomationControlled"],
     )
 
 
+def setup_browser(playwright):
+    context = playwright.chromium.launch_persistent_context(
+        BROWSER_PROFILE_DIR,
+        headless=False,
+        args=LAUNCH_ARGS,
+        **_context_options(),
+    )
+    context.on("response", _watch_sign_in)
+    return context
+
+
+_pool_local = threading.local()
+
+
+def pooled_context():
+    """The browser context owned by the calling ContextPool worker thread."""
+    return _pool_local.context
+
+
+class ContextPool(Executor):
+    """Executor whose worker threads each own a headless browser context.
+
+    Sync Playwright objects only work on the thread that created them, so
+    instead of lending contexts out, jobs run on a thread that owns one —
+    call pooled_context() inside the job to get it. Contexts start from
+    storage_state (e.g. the signed-in profile's cookies) and are recreated
+    every recycle_after jobs to cap memory growth in long sessions. With
+    block_resources, each context drops images, fonts and CSS (see
+    block_heavy_resources), so only use it for scraping.
+    """
+
+    def __init__(self, size=4, storage_state=None, recycle_after=25, block_resources=True):
+        self._jobs = queue.Queue()
+        self._storage_state = storage_state
+        self._recycle_after = recycle_after
+        self._block_resources = block_resources
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"context-pool-{i}", daemon=True)
+            for i in range(size)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        # Under the lock so no job can land behind the shutdown sentinels
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a ContextPool after shutdown")
+            future = Future()
+            self._jobs.put((future, fn, args, kwargs))
+            return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._shutdown_lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        job[0].cancel()
+            # One sentinel per worker; each worker exits after taking one
+            for _ in self._threads:
+                self._jobs.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def _worker(self):
+        from playwright.sync_api import sync_playwright
+
+        pw = browser = context = None
+        uses = 0
+
+        def ensure_context():
+            nonlocal pw, browser, context, uses
+            # A crashed or disconnected browser is dropped and relaunched below
+            if browser is not None and not browser.is_connected():
+                browser = context = None
+            if context is not None and uses >= self._recycle_after:
+                # Detach the route handler before closing; long-lived routes leak
+                try:
+                    if self._block_resources:
+                        context.unroute("**/*", block_heavy_resources)
+                    context.close()
+                except Exception:
+                    pass
+                context = None
+            if context is None:
+                if browser is None:
+                    pw = pw or sync_playwright().start()
+                    browser = pw.chromium.launch(headless=True, args=LAUNCH_ARGS)
+                context = browser.new_context(storage_state=self._storage_state, **_context_options())
+                if self._block_resources:
+                    context.route("**/*", block_heavy_resources)
+                uses = 0
+            return context
+
+        # Launch eagerly so the first job doesn't pay the cold start
+        try:
+            ensure_context()
+        except Exception as e:
+            logger.error(f"Context pool worker failed to start: {e}")
+
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    _pool_local.context = ensure_context()
+                    uses += 1
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            if browser is not None:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+            if pw is not None:
+                try:
+                    pw.stop()
+                except Exception:
+                    pass
+
+
+def block_heavy_resources(route):
+    """Route handler that aborts images, fonts, CSS and tracking requests.
+
+    Usage: page.route("**/*", block_heavy_resources)
+    """
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        route.abort()
+    else:
+        route.continue_()
+
+
+SIGN_IN_TTL = 600  # seconds a confirmed sign-in is trusted without reloading
+_signed_in_at = 0.0
+
+
+def _watch_sign_in(response):
+    """Forget a cached sign-in when Amazon answers 401 or redirects to its login page."""
+    global _signed_in_at
+    if response.status == 401 or (
+        "/ap/signin" in response.url and response.request.is_navigation_request()
+    ):
+        _signed_in_at = 0.0
+
+
 def is_signed_in(page):
     """Check if currently signed into Amazon."""
     try:
         nav_text = page.locator("#nav-link-accountList-nav-line-1").text_content(timeout=3000)
-        return nav_text and "sign in" not in nav_text.lower() and "hello" in nav_text.lower()
+        return bool(nav_text) and "sign in" not in nav_text.lower() and "hello" in nav_text.lower()
     except Exception:
         return False
 
 
 def ensure_signed_in(page, timeout_seconds=90):
-    """Navigate to Amazon and wait for sign-in. Returns True if signed in."""
+    """Navigate to Amazon and wait for sign-in. Returns True if signed in.
+
+    Skips the navigation when the account page confirmed sign-in within
+    SIGN_IN_TTL and the current page still shows it. Only that reload
+    restarts the TTL; a 401 or login redirect seen since clears it.
+    """
+    global _signed_in_at
+    if time.time() - _signed_in_at < SIGN_IN_TTL and is_signed_in(page):
+        return True
+
     page.goto(f"{AMAZON_CA}/gp/css/homepage.html", wait_until="domcontentloaded", timeout=30000)
-    delay(3, 5)
+    try:
+        page.wait_for_selector("#nav-link-accountList", timeout=10000)
+    except Exception:
+        pass
+    delay(0.2, 0.5)
 
     start = time.time()
     while time.time() - start < timeout_seconds:
         if is_signed_in(page):
+            _signed_in_at = time.time()
             return True
-        time.sleep(3)
+        time.sleep(1)
+    _signed_in_at = 0.0
     return False
 
 
@@ -87,24 +275,24 @@ def dismiss_popups(page):
         "button[data-action='a-popover-close']",
         "button.a-button-close",
     ]
-    for sel in selectors:
-        try:
-            el = page.locator(sel).first
-            if el.is_visible(timeout=1500):
-                el.click(force=True)
-                delay(1, 2)
-                return True
-        except Exception:
-            continue
+    # One round-trip for all selectors; count() doesn't auto-wait
+    try:
+        el = page.locator(f"{', '.join(selectors)} >> visible=true").first
+        if el.count():
+            el.click(force=True)
+            delay(0.2, 0.5)
+            return True
+    except Exception:
+        pass
 
     result = page.evaluate("""
     () => {
-        const els = document.querySelectorAll('button, a, span, input');
-        for (const el of els) {
-            if (el.textContent.trim().toLowerCase().includes('no thanks')) {
-                el.click();
-                return 'dismissed';
-            }
+        const el = [...document.querySelectorAll('button, a')].find(
+            el => el.innerText && el.innerText.trim().toLowerCase() === 'no thanks'
+        );
+        if (el) {
+            el.click();
+            return 'dismissed';
         }
         const close = document.querySelector('#attach-close_sideSheet-link, .a-popover-close');
         if (close) { close.click(); return 'closed'; }
@@ -112,7 +300,7 @@ def dismiss_popups(page):
     }
     """)
     if result != 'none':
-        delay(1, 2)
+        delay(0.2, 0.5)
         return True
     return False
 
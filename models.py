@@ -0,0 +1,19 @@
+"""Data types shared by the search module and the bot.
+
+Needs Python 3.10+ (slotted dataclasses, X | None annotations).
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True, frozen=True)
+class Product:
+    """One ranked search result."""
+    title: str
+    price: float | None
+    rating: float | None
+    reviews: int | None
+    screen_size: float | None
+    url: str | None
+    asin: str
+    score: float = 0.0
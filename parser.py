@@ -12,12 +12,47 @@ Examples:
     "status"                            → status
 """
 
+import functools
 import re
 
+_BUDGET_PATTERNS = (
+    r'\$\s*(\d+(?:\.\d+)?)',
+    r'(\d+(?:\.\d+)?)\s*(?:dollars?|bucks?|cad|\$)',
+    r'(?:under|below|max|budget|less than|up to)\s*\$?\s*(\d+(?:\.\d+)?)',
+    r'(\d+(?:\.\d+)?)\s*(?:max|budget|limit)',
+)
+_BUDGET_RES = [re.compile(p) for p in _BUDGET_PATTERNS]
+# All budget patterns in one match(): each branch is a lookahead that scans the
+# whole text for one pattern, so earlier patterns still take priority (as in a
+# for-loop of searches) rather than whichever occurs first in the text.
+_BUDGET_ANY_RE = re.compile(
+    '|'.join(f'(?=.*?(?P<b{i}>{p}))' for i, p in enumerate(_BUDGET_PATTERNS)),
+    re.DOTALL,
+)
+# Longest first so "find me" wins over "find"
+_TRIGGER_RE = re.compile(
+    r'^(?:looking for|look for|shop for|find me|get me|show me|i want|i need|search|find|buy)\b\s*'
+)
+# Exact one-word/phrase commands → intent, resolved with a single lookup
+_EXACT = (
+    {k: "help" for k in ("help", "start", "h")}
+    | {k: "status" for k in ("status", "ping")}
+    | {k: "cart" for k in ("cart", "showcart", "show cart", "view cart", "my cart")}
+    | {k: "results" for k in ("results", "show results", "last", "last results")}
+)
+_STOPWORDS_RE = re.compile(r'\b(a|an|the|me|for|on|amazon|please|good|best|nice|great)\b')
+_WS_RE = re.compile(r'\s+')
+_BOT_MENTION_RE = re.compile(r'^(\w+)@\w+')
+_NUMS_RE = re.compile(r'\d+')
+_TRAILING_NUM_RE = re.compile(r'^\d+$')
+
 
 def parse_message(text):
     """Parse a text message into a command dict.
 
+    Repeated messages ("cart", "add all", ...) are served from a cache; each
+    call still gets its own dict.
+
     Returns:
         dict with keys:
             intent: "search" | "add" | "cart" | "results" | "status" | "help" | "unknown"
@@ -26,34 +61,36 @@ def parse_message(text):
             items: "all" | list of ints (for add)
             raw: str (original message)
     """
+    result = dict(_parse_cached(text.strip()))
+    if isinstance(result["items"], tuple):
+        result["items"] = list(result["items"])
+    return result
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_cached(text):
+    """Immutable (key, value) snapshot of _parse(text), safe to share."""
+    result = _parse(text)
+    if isinstance(result["items"], list):
+        result["items"] = tuple(result["items"])
+    return tuple(result.items())
+
+
+def _parse(text):
     raw = text.strip()
     lower = raw.lower()
 
-    # Strip leading / for slash commands
+    # Strip leading / (and a group-chat @botname suffix) for slash commands
     if lower.startswith("/"):
-        lower = lower[1:]
-        raw = raw[1:]
+        lower = _BOT_MENTION_RE.sub(r'\1', lower[1:])
+        raw = _BOT_MENTION_RE.sub(r'\1', raw[1:])
 
     result = {"intent": "unknown", "query": "", "budget": 9999.0, "budget_specified": False, "items": [], "raw": text.strip()}
 
-    # --- Help ---
-    if lower in ("help", "start", "h"):
-        result["intent"] = "help"
-        return result
-
-    # --- Status ---
-    if lower in ("status", "ping"):
-        result["intent"] = "status"
-        return result
-
-    # --- Cart ---
-    if lower in ("cart", "showcart", "show cart", "view cart", "my cart"):
-        result["intent"] = "cart"
-        return result
-
-    # --- Results ---
-    if lower in ("results", "show results", "last", "last results"):
-        result["intent"] = "results"
+    # --- Help / status / cart / results ---
+    intent = _EXACT.get(lower)
+    if intent:
+        result["intent"] = intent
         return result
 
     # --- Add to cart ---
@@ -65,7 +102,7 @@ def parse_message(text):
             result["items"] = "all"
         else:
             # Extract numbers: "add 1 3 5" or "add 1, 3, 5" or "add first three"
-            nums = re.findall(r'\d+', rest)
+            nums = _NUMS_RE.findall(rest)
             if nums:
                 result["items"] = [int(n) for n in nums]
             else:
@@ -80,16 +117,13 @@ def parse_message(text):
         return result
 
     # --- Search ---
-    search_triggers = ["search", "find", "look for", "looking for", "get me", "find me",
-                       "show me", "i want", "i need", "buy", "shop for"]
     is_search = False
     search_rest = lower
 
-    for trigger in search_triggers:
-        if lower.startswith(trigger):
-            is_search = True
-            search_rest = lower[len(trigger):].strip()
-            break
+    m = _TRIGGER_RE.match(lower)
+    if m:
+        is_search = True
+        search_rest = lower[m.end():].strip()
 
     # If no trigger matched, treat any unrecognized message as a search
     if not is_search:
@@ -100,30 +134,23 @@ def parse_message(text):
         result["intent"] = "search"
 
         # Extract budget: "$300", "300 dollars", "under 300", "budget 300", "max 300"
-        budget_patterns = [
-            r'\$\s*(\d+(?:\.\d+)?)',
-            r'(\d+(?:\.\d+)?)\s*(?:dollars?|bucks?|cad|\$)',
-            r'(?:under|below|max|budget|less than|up to)\s*\$?\s*(\d+(?:\.\d+)?)',
-            r'(\d+(?:\.\d+)?)\s*(?:max|budget|limit)',
-        ]
-        for pat in budget_patterns:
-            m = re.search(pat, search_rest)
-            if m:
-                result["budget"] = float(m.group(1))
-                result["budget_specified"] = True
-                search_rest = re.sub(pat, '', search_rest).strip()
-                break
+        m = _BUDGET_ANY_RE.match(search_rest)
+        if m:
+            # lastindex is the winning b<i> group; its amount group comes right after
+            result["budget"] = float(m.group(m.lastindex + 1))
+            result["budget_specified"] = True
+            search_rest = _BUDGET_RES[int(m.lastgroup[1:])].sub('', search_rest).strip()
         else:
             # Check if the last word is a number > 10 (assumed budget, not a product spec)
             words = search_rest.split()
-            if words and re.match(r'^\d+$', words[-1]) and int(words[-1]) > 10:
+            if words and _TRAILING_NUM_RE.match(words[-1]) and int(words[-1]) > 10:
                 result["budget"] = float(words[-1])
                 result["budget_specified"] = True
                 search_rest = ' '.join(words[:-1])
 
         # Clean up query
-        search_rest = re.sub(r'\b(a|an|the|me|for|on|amazon|please|good|best|nice|great)\b', '', search_rest)
-        search_rest = re.sub(r'\s+', ' ', search_rest).strip()
+        search_rest = _STOPWORDS_RE.sub('', search_rest)
+        search_rest = _WS_RE.sub(' ', search_rest).strip()
 
         result["query"] = search_rest if search_rest else "portable monitor"
         return result